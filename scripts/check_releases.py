@@ -5,66 +5,110 @@ Check for new releases from monitored repositories
 import os
 import sys
 import json
-from github import Github, Auth
+import asyncio
+import httpx
 from pathlib import Path
 
 
+API_URL = "https://api.github.com"
+
+# Restored and saved by actions/cache in the check job, which never commits
+ETAG_DIR = Path(".cache/releases")
+
 REPOS = [
     {"owner": "Pixel-Props", "name": "build.prop", "type": "stable"},
     {"owner": "Elcapitanoe", "name": "Build-Prop-BETA", "type": "experimental"}
 ]
 
 
-def check_releases(github_token):
-    """Check all repos for new releases"""
-    auth = Auth.Token(github_token)
-    g = Github(auth=auth)
-    
-    results = []
-    
-    for repo_config in REPOS:
+async def check_repo(client, repo_config):
+    """Check one repo; returns its result entry if there is a new release"""
+    full_name = f"{repo_config['owner']}/{repo_config['name']}"
+    try:
+        tag_file = Path(f"last_release_{repo_config['type']}_tag.txt")
+        last_tag = tag_file.read_text().strip() if tag_file.exists() else None
+        
+        # Conditional GET: a 304 has no body and doesn't count against the rate limit.
+        # Only valid while the ETag was saved for the tag we last processed, so a
+        # failed generation or a hand-edited tag file still gets a full response
+        etag_file = ETAG_DIR / f"{repo_config['type']}.json"
         try:
-            repo = g.get_repo(f"{repo_config['owner']}/{repo_config['name']}")
-            
-            try:
-                latest = repo.get_latest_release()
-            except:
-                print(f"[WARN] No releases for {repo.full_name}")
-                continue
-            
-            tag = latest.tag_name
-            tag_file = Path(f"last_release_{repo_config['type']}_tag.txt")
-            
-            # Check if new
-            if tag_file.exists() and tag_file.read_text().strip() == tag:
-                print(f"[INFO] {repo.full_name} @ {tag} - Already processed")
-                continue
-            
-            # Get ALL ZIP assets
-            assets = []
-            for asset in latest.get_assets():
-                if asset.name.endswith('.zip'):
-                    assets.append({
-                        "name": asset.name,
-                        "url": asset.browser_download_url
-                    })
-            
-            if not assets:
-                print(f"[WARN] No ZIP assets in {tag}")
-                continue
-            
-            print(f"[NEW] {repo.full_name} @ {tag} - {len(assets)} assets")
-            
-            results.append({
-                "repo_type": repo_config['type'],
-                "latest_tag": tag,
-                "assets": assets,
-                "count": len(assets)
-            })
+            saved = json.loads(etag_file.read_text())
+        except (FileNotFoundError, ValueError):
+            saved = {}
+        headers = {}
+        if last_tag and saved.get("tag") == last_tag and saved.get("etag"):
+            headers["If-None-Match"] = saved["etag"]
+        
+        resp = await client.get(f"/repos/{full_name}/releases/latest", headers=headers)
+        
+        if resp.status_code == 304:
+            print(f"[INFO] {full_name} - Unchanged since last check")
+            return None
+        if resp.status_code == 404:
+            print(f"[WARN] No releases for {full_name}")
+            return None
+        resp.raise_for_status()
+        
+        latest = resp.json()
+        tag = latest["tag_name"]
+        
+        # Asset download counts are part of the payload, so the ETag changes
+        # between runs even without a new release; keep it fresh on every 200
+        etag = resp.headers.get("ETag")
+        if etag:
+            ETAG_DIR.mkdir(parents=True, exist_ok=True)
+            etag_file.write_text(json.dumps({"tag": tag, "etag": etag}))
         
-        except Exception as e:
-            print(f"[ERROR] {repo_config['owner']}/{repo_config['name']}: {e}")
-            continue
+        # Check if new
+        if last_tag == tag:
+            print(f"[INFO] {full_name} @ {tag} - Already processed")
+            return None
+        
+        # Get ALL ZIP assets (the release payload already lists them)
+        assets = []
+        for asset in latest.get("assets", []):
+            if asset["name"].endswith('.zip'):
+                assets.append({
+                    "name": asset["name"],
+                    "url": asset["browser_download_url"],
+                    # Content identity that survives re-uploads; keys the PIF cache
+                    "digest": asset.get("digest")
+                })
+        
+        if not assets:
+            print(f"[WARN] No ZIP assets in {tag}")
+            return None
+        
+        print(f"[NEW] {full_name} @ {tag} - {len(assets)} assets")
+        
+        return {
+            "repo_type": repo_config['type'],
+            "latest_tag": tag,
+            "assets": assets,
+            "count": len(assets)
+        }
+    
+    except Exception as e:
+        print(f"[ERROR] {full_name}: {e}")
+        return None
+
+
+async def check_all(github_token):
+    """Check every repo concurrently over one HTTP/2 connection"""
+    headers = {
+        "Authorization": f"Bearer {github_token}",
+        "Accept": "application/vnd.github+json"
+    }
+    # Renamed or transferred repos answer with a 301 to their new location
+    async with httpx.AsyncClient(base_url=API_URL, headers=headers, http2=True, timeout=30,
+                                 follow_redirects=True) as client:
+        return await asyncio.gather(*(check_repo(client, repo_config) for repo_config in REPOS))
+
+
+def check_releases(github_token):
+    """Check all repos for new releases"""
+    results = [result for result in asyncio.run(check_all(github_token)) if result]
     
     # Output results
     if results:
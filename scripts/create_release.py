@@ -4,11 +4,25 @@ Create GitHub release and upload files
 """
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from github import Github, Auth, GithubException
 from datetime import datetime, UTC
 
 
+MAX_UPLOAD_WORKERS = 8
+
+# Upload workers print too, so every line goes through one lock
+_print_lock = threading.Lock()
+
+
+def log(*args, **kwargs):
+    """Thread-safe print"""
+    with _print_lock:
+        print(*args, **kwargs)
+
+
 def create_release(repo_name, tag, repo_type, files):
     """Create release and upload files"""
     token = os.getenv("GITHUB_TOKEN")
@@ -26,11 +40,11 @@ def create_release(repo_name, tag, repo_type, files):
             name=f"{repo_type} PIF - {tag}",
             message=notes
         )
-        print(f"[OK] Created release: {release_tag}")
+        log(f"[OK] Created release: {release_tag}")
     except GithubException as e:
         if e.status == 422:  # Already exists
             release = repo.get_release(release_tag)
-            print(f"[INFO] Release exists: {release_tag}")
+            log(f"[INFO] Release exists: {release_tag}")
         else:
             raise
     
@@ -38,42 +52,53 @@ def create_release(repo_name, tag, repo_type, files):
     existing_assets = {asset.name: asset for asset in release.get_assets()}
     
     # Upload files
-    uploaded = 0
     skipped = 0
+    pending = []
     
     for file in files:
         filepath = Path(file)
         if not filepath.exists():
-            print(f"[SKIP] File not found: {file}")
+            log(f"[SKIP] File not found: {file}")
             continue
         
         filename = filepath.name
         
         # Check if already uploaded
         if filename in existing_assets:
-            print(f"[SKIP] Already uploaded: {filename}")
+            log(f"[SKIP] Already uploaded: {filename}")
             skipped += 1
             
             # Optional: Delete and re-upload to update
             # existing_assets[filename].delete_asset()
-            # print(f"[UPDATE] Deleted old version: {filename}")
-            # release.upload_asset(str(filepath))
-            # print(f"[UPLOAD] Re-uploaded: {filename}")
-            # uploaded += 1
+            # log(f"[UPDATE] Deleted old version: {filename}")
+            # pending.append(filepath)
         else:
+            pending.append(filepath)
+    
+    def upload(filepath):
+        log(f"[UPLOAD] {filepath.name}")
+        release.upload_asset(str(filepath))
+    
+    # Each upload is a separate multi-second POST, so run them side by side
+    failed = []
+    with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as executor:
+        futures = {executor.submit(upload, filepath): filepath for filepath in pending}
+        for future in as_completed(futures):
             try:
-                print(f"[UPLOAD] {filename}")
-                release.upload_asset(str(filepath))
-                uploaded += 1
-            except GithubException as e:
-                print(f"[ERROR] Failed to upload {filename}: {e}")
+                future.result()
+            except Exception as e:
+                # Network errors from requests surface here too, not just API errors
+                log(f"[ERROR] Failed to upload {futures[future].name}: {e}")
+                failed.append(futures[future].name)
+    
+    uploaded = len(pending) - len(failed)
     
-    print(f"\n[SUMMARY] Uploaded: {uploaded}, Skipped: {skipped}/{len(files)}")
+    log(f"\n[SUMMARY] Uploaded: {uploaded}, Skipped: {skipped}, Failed: {len(failed)}/{len(files)}")
 
 
 if __name__ == "__main__":
     if len(sys.argv) != 4:
-        print("Usage: create_release.py <repo> <tag> <repo_type>")
+        log("Usage: create_release.py <repo> <tag> <repo_type>")
         sys.exit(1)
     
     files = Path("generated_files.txt").read_text().splitlines()
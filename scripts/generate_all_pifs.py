@@ -4,10 +4,15 @@ Generate all PIF JSON files from asset list
 """
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.pif_generator import PIFGenerator
+from src.pif_generator import AssetCache, PIFGenerator, buffered_log, replay_log
+
+
+MAX_WORKERS = 16
+CACHE_DIR = ".cache/assets"
 
 
 def main():
@@ -21,27 +26,46 @@ def main():
     print(f"[INFO] Processing {len(assets)} assets for {repo_type}")
     print("=" * 60)
     
-    generator = PIFGenerator(repo_type)
-    
-    generated = []
-    failed = []
+    cache = AssetCache(CACHE_DIR)
+    generator = PIFGenerator(repo_type, cache=cache)
     
-    for i, asset in enumerate(assets, 1):
-        print(f"\n[{i}/{len(assets)}] {asset['name']}")
-        print("-" * 60)
-        
-        try:
-            filename = generator.generate(asset['name'], asset['url'])
-            generated.append(filename)
+    def process(asset, lines):
+        """Generate and verify a single asset (runs in a worker thread)"""
+        # Hold this asset's log lines back so they print together under its header
+        with buffered_log(lines):
+            filename = generator.generate(asset['name'], asset['url'], asset.get('digest'))
             
             # Verify file exists and is valid JSON
             with open(filename) as f:
                 data = json.load(f)
-                print(f"[VERIFY] All fields: {all(data.values())}")
-                
-        except Exception as e:
-            print(f"[FAILED] {e}")
-            failed.append(asset['name'])
+        
+        return filename, all(data.values())
+    
+    # Downloads dominate, so fan the assets out across a thread pool
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(assets)) or 1) as executor:
+        futures = {}
+        for i, asset in enumerate(assets, 1):
+            lines = [((f"\n[{i}/{len(assets)}] {asset['name']}\n" + "-" * 60,), {})]
+            futures[executor.submit(process, asset, lines)] = (i, asset, lines)
+        
+        succeeded = {}
+        errored = {}
+        for future in as_completed(futures):
+            i, asset, lines = futures[future]
+            try:
+                filename, verified = future.result()
+                succeeded[i] = filename
+                lines.append(((f"[VERIFY] All fields: {verified}",), {}))
+            except Exception as e:
+                errored[i] = asset['name']
+                lines.append(((f"[FAILED] {e}",), {}))
+            replay_log(lines)
+    
+    cache.prune()
+    
+    # Report in input order regardless of completion order
+    generated = [succeeded[i] for i in sorted(succeeded)]
+    failed = [errored[i] for i in sorted(errored)]
     
     # Summary
     print("\n" + "=" * 60)
@@ -0,0 +1,413 @@
+"""
+Hot-path system.prop parsing and PIF building
+
+Pure string/dict work with no I/O, fully annotated so it can be compiled
+with mypyc (see README); pif_generator imports the compiled extension when
+one has been built and this source otherwise.
+"""
+import re
+from json.encoder import encode_basestring_ascii
+from typing import Iterable, Optional, Union
+
+
+Props = dict[str, str]
+Pif = dict[str, Union[str, bool]]
+
+# key=value line; comments skipped, surrounding whitespace trimmed
+PROP_RE = re.compile(rb'[^\S\n]*([^#=\s][^=\n]*?)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$')
+
+# Build ID date stamp (BP3A.251005.004.B3 -> 25, 10, 05) and the build ID
+# embedded in a fingerprint (.../BP3A.251005.004.B3/...)
+BUILD_DATE_RE = re.compile(r'\.(\d{2})(\d{2})(\d{2})\.')
+FP_BUILD_ID_RE = re.compile(r'/([A-Z0-9]+\.\d{6}\.[^/]+)/')
+
+
+def pif_template(fields: tuple[str, ...]) -> str:
+    """Build a %-template that reproduces json.dumps(obj, indent=2) for a fixed key order"""
+    return '{\n' + ',\n'.join(f'  {encode_basestring_ascii(field)}: %s' for field in fields) + '\n}'
+
+
+def json_scalar(value: Union[str, bool]) -> str:
+    """Encode a str or bool exactly as json.dumps would"""
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    return encode_basestring_ascii(value)
+
+
+# Property lookup precedence per field, highest priority first
+LEGACY_FINGERPRINT_KEYS = (
+    'ro.build.fingerprint',
+    'ro.product.build.fingerprint',
+    'ro.bootimage.build.fingerprint',
+    'ro.vendor.build.fingerprint',
+    'ro.system.build.fingerprint',
+)
+LEGACY_PRODUCT_KEYS = (
+    'ro.build.product',
+    'ro.product.device',
+    'ro.product.name',
+    'ro.product.board',
+)
+LEGACY_DEVICE_KEYS = (
+    'ro.product.device',
+    'ro.build.product',
+    'ro.product.board',
+)
+LEGACY_API_LEVEL_KEYS = (
+    'ro.product.first_api_level',
+    'ro.board.first_api_level',
+    'ro.board.api_level',
+    'ro.build.version.sdk',
+    'ro.system.build.version.sdk',
+)
+LEGACY_MANUFACTURER_KEYS = ('ro.product.manufacturer',)
+LEGACY_MODEL_KEYS = ('ro.product.model',)
+LEGACY_BRAND_KEYS = ('ro.product.brand',)
+FINGERPRINT_KEYS = (
+    'ro.system_ext.build.fingerprint',
+    'ro.system.build.fingerprint',
+    'ro.build.fingerprint',
+    'ro.product.build.fingerprint',
+    'ro.bootimage.build.fingerprint',
+    'ro.vendor.build.fingerprint',
+    'ro.system_dlkm.build.fingerprint',
+)
+BUILD_ID_KEYS = (
+    'ro.system_ext.build.id',
+    'ro.system.build.id',
+    'ro.build.id',
+    'ro.vendor.build.id',
+    'ro.system_dlkm.build.id',
+)
+PRODUCT_KEYS = (
+    'ro.product.system_ext.name',
+    'ro.product.system.name',
+    'ro.product.name',
+    'ro.build.product',
+    'ro.product.system_ext.device',
+    'ro.product.device',
+    'ro.product.board',
+)
+DEVICE_KEYS = (
+    'ro.product.system_ext.device',
+    'ro.product.system.device',
+    'ro.product.device',
+    'ro.build.product',
+    'ro.product.board',
+)
+BRAND_KEYS = (
+    'ro.product.system_ext.brand',
+    'ro.product.system.brand',
+    'ro.product.brand',
+)
+MANUFACTURER_KEYS = (
+    'ro.product.system_ext.manufacturer',
+    'ro.product.system.manufacturer',
+    'ro.product.manufacturer',
+)
+MODEL_KEYS = (
+    'ro.product.system_ext.model',
+    'ro.product.system.model',
+    'ro.product.model',
+)
+INITIAL_SDK_KEYS = (
+    'ro.product.first_api_level',
+    'ro.board.first_api_level',
+    'ro.board.api_level',
+    'ro.system_ext.build.version.sdk',
+    'ro.system.build.version.sdk',
+    'ro.build.version.sdk',
+)
+BUILD_TYPE_KEYS = (
+    'ro.system_ext.build.type',
+    'ro.system.build.type',
+    'ro.build.type',
+)
+BUILD_TAGS_KEYS = (
+    'ro.system_ext.build.tags',
+    'ro.system.build.tags',
+    'ro.build.tags',
+)
+RELEASE_KEYS = (
+    'ro.system_ext.build.version.release',
+    'ro.system.build.version.release',
+    'ro.build.version.release',
+    'ro.build.version.release_or_codename',
+)
+SECURITY_PATCH_KEYS = (
+    'ro.build.version.security_patch',
+    'ro.vendor.build.security_patch',
+)
+DEBUGGABLE_KEYS = ('ro.debuggable',)
+
+# Every lookup chain each format reads
+LEGACY_FIELD_KEYS = (
+    LEGACY_FINGERPRINT_KEYS, LEGACY_PRODUCT_KEYS, LEGACY_DEVICE_KEYS, LEGACY_API_LEVEL_KEYS,
+    LEGACY_MANUFACTURER_KEYS, LEGACY_MODEL_KEYS, LEGACY_BRAND_KEYS, SECURITY_PATCH_KEYS,
+)
+FIELD_KEYS = (
+    FINGERPRINT_KEYS, BUILD_ID_KEYS, PRODUCT_KEYS, DEVICE_KEYS, BRAND_KEYS, MANUFACTURER_KEYS,
+    MODEL_KEYS, INITIAL_SDK_KEYS, BUILD_TYPE_KEYS, BUILD_TAGS_KEYS, RELEASE_KEYS,
+    SECURITY_PATCH_KEYS, DEBUGGABLE_KEYS,
+)
+
+# PIF key order per format; the schema is fixed, so serialize via a template
+LEGACY_PIF_FIELDS = (
+    'MANUFACTURER', 'MODEL', 'FINGERPRINT', 'BRAND', 'PRODUCT', 'DEVICE',
+    'SECURITY_PATCH', 'FIRST_API_LEVEL',
+)
+PIF_FIELDS = (
+    'ID', 'BRAND', 'DEVICE', 'MANUFACTURER', 'FINGERPRINT', 'MODEL', 'PRODUCT',
+    'SECURITY_PATCH', 'DEVICE_INITIAL_SDK_INT', 'TYPE', 'TAG', 'RELEASE', 'DEBUG',
+    'spoofBuild', 'spoofProps', 'spoofProvider', 'spoofSignature', 'spoofVendingSdk',
+    'verboseLogs',
+)
+LEGACY_PIF_TEMPLATE = pif_template(LEGACY_PIF_FIELDS)
+PIF_TEMPLATE = pif_template(PIF_FIELDS)
+
+# Integer fields and their minimum (21 = Android 5.0)
+API_LEVEL_FIELDS = (
+    ('FIRST_API_LEVEL', 21),
+    ('DEVICE_INITIAL_SDK_INT', 21),
+)
+
+
+def field_keys(output_format: str) -> tuple[tuple[str, ...], ...]:
+    """Every lookup chain build_pif reads for output_format"""
+    return LEGACY_FIELD_KEYS if output_format == 'legacy' else FIELD_KEYS
+
+
+def needed_keys(output_format: str) -> frozenset[bytes]:
+    """Raw keys build_pif can read for output_format"""
+    return frozenset(key.encode() for keys in field_keys(output_format) for key in keys)
+
+
+def decisive_keys(output_format: str) -> frozenset[bytes]:
+    """Top-priority raw key of each chain; once all are seen every field is decided"""
+    return frozenset(keys[0].encode() for keys in field_keys(output_format))
+
+
+def parse_system_prop(lines: Iterable[bytes], needed: Optional[frozenset[bytes]] = None,
+                      decisive: frozenset[bytes] = frozenset()) -> Props:
+    """
+    Parse Android system.prop lines (raw bytes) into trimmed str values
+    
+    Args:
+        lines: iterable of raw lines
+        needed: if given, keep only these keys and stop reading once
+            every key in decisive has a non-empty value
+        decisive: see needed
+    """
+    props: Props = {}
+    if needed is None:
+        for line in lines:
+            match = PROP_RE.match(line)
+            if match:
+                props[match[1].decode('utf-8')] = match[2].decode('utf-8')
+        return props
+    
+    remaining = set(decisive)
+    for line in lines:
+        match = PROP_RE.match(line)
+        if not match:
+            continue
+        key: bytes = match[1]
+        if key not in needed:
+            continue
+        
+        value: bytes = match[2]
+        props[key.decode('utf-8')] = value.decode('utf-8')
+        if value:
+            remaining.discard(key)
+            if not remaining:
+                break
+    return props
+
+
+def first(props: Props, keys: tuple[str, ...], default: str = '') -> str:
+    """Return the first non-empty value among keys, in precedence order"""
+    for key in keys:
+        value = props.get(key)
+        if value:
+            return value
+    return default
+
+
+def extract_security_patch(fingerprint: str, build_id: str) -> str:
+    """Extract security patch date from fingerprint or build ID"""
+    # Try to extract from build ID format: BP3A.251005.004.B3 -> 2025-10-05
+    if build_id:
+        match = BUILD_DATE_RE.search(build_id)
+        if match:
+            return f"20{match[1]}-{match[2]}-{match[3]}"
+    
+    # Try to extract from fingerprint
+    if fingerprint:
+        match = FP_BUILD_ID_RE.search(fingerprint)
+        if match:
+            date_match = BUILD_DATE_RE.search(match[1])
+            if date_match:
+                return f"20{date_match[1]}-{date_match[2]}-{date_match[3]}"
+    
+    return ""
+
+
+def validate_pif(pif: Pif, output_format: str, api_level: Optional[int] = None) -> bool:
+    """
+    Validate PIF has no empty fields
+    
+    Args:
+        pif: PIF dict to validate
+        output_format: 'legacy' or 'new'
+        api_level: API level build_pif already parsed, to skip re-parsing it
+    """
+    required_fields = ['MANUFACTURER', 'MODEL', 'FINGERPRINT', 'BRAND', 'PRODUCT', 'DEVICE']
+    
+    # Add ID requirement only for new format
+    if output_format == 'new':
+        required_fields.append('ID')
+    
+    for field in required_fields:
+        value = pif.get(field, '')
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Field '{field}' is empty or missing")
+    
+    # Validate FIRST_API_LEVEL (legacy) / DEVICE_INITIAL_SDK_INT (new)
+    for field, minimum in API_LEVEL_FIELDS:
+        if field not in pif:
+            continue
+        
+        level = api_level
+        if level is None:
+            try:
+                level = int(pif[field])
+            except (ValueError, TypeError):
+                raise ValueError(f"{field} must be a valid integer: {pif[field]}")
+        
+        if level < minimum:
+            raise ValueError(f"Invalid {field}: {level}")
+    
+    # Validate SECURITY_PATCH format (YYYY-MM-DD)
+    security_patch = pif.get('SECURITY_PATCH', '')
+    if isinstance(security_patch, str) and security_patch and len(security_patch) != 10:
+        raise ValueError(f"Invalid SECURITY_PATCH format: {security_patch}")
+    
+    return True
+
+
+def build_pif(props: Props, output_format: str) -> Pif:
+    """Build PIF JSON from properties with strict validation
+    
+    props values must already be trimmed, as parse_system_prop returns them
+    """
+    pif: Pif
+    
+    if output_format == 'legacy':
+        # ===== LEGACY FORMAT (ORIGINAL IMPLEMENTATION) =====
+        fingerprint = first(props, LEGACY_FINGERPRINT_KEYS)
+        
+        if not fingerprint:
+            raise ValueError("No fingerprint found in system.prop")
+        
+        product = first(props, LEGACY_PRODUCT_KEYS)
+        device = first(props, LEGACY_DEVICE_KEYS)
+        api_level = int(first(props, LEGACY_API_LEVEL_KEYS, '0'))
+        
+        # Build PIF
+        pif = {
+            "MANUFACTURER": first(props, LEGACY_MANUFACTURER_KEYS, 'Google'),
+            "MODEL": first(props, LEGACY_MODEL_KEYS, 'Unknown'),
+            "FINGERPRINT": fingerprint,
+            "BRAND": first(props, LEGACY_BRAND_KEYS, 'google'),
+            "PRODUCT": product,
+            "DEVICE": device,
+            "SECURITY_PATCH": first(props, SECURITY_PATCH_KEYS),
+            "FIRST_API_LEVEL": str(api_level)
+        }
+    
+    else:
+        # ===== NEW EXTENDED FORMAT =====
+        # Every field prefers system_ext, then system, then the generic keys
+        fingerprint = first(props, FINGERPRINT_KEYS)
+        
+        if not fingerprint:
+            raise ValueError("No fingerprint found in system.prop")
+        
+        build_id = first(props, BUILD_ID_KEYS)
+        
+        if not build_id:
+            raise ValueError("No build ID found in system.prop")
+        
+        product = first(props, PRODUCT_KEYS)
+        device = first(props, DEVICE_KEYS)
+        brand = first(props, BRAND_KEYS, 'google')
+        manufacturer = first(props, MANUFACTURER_KEYS, 'Google')
+        model = first(props, MODEL_KEYS, 'Unknown')
+        
+        # Device initial SDK (when device hardware first launched)
+        api_level = int(first(props, INITIAL_SDK_KEYS, '0'))
+        
+        build_type = first(props, BUILD_TYPE_KEYS, 'user')
+        build_tags = first(props, BUILD_TAGS_KEYS, 'release-keys')
+        release = first(props, RELEASE_KEYS)
+        
+        # Extract security patch from properties or fingerprint/build ID
+        security_patch = first(props, SECURITY_PATCH_KEYS)
+        
+        if not security_patch:
+            security_patch = extract_security_patch(fingerprint, build_id)
+        
+        # Determine DEBUG flag
+        debuggable = first(props, DEBUGGABLE_KEYS, '0')
+        is_debug = build_type in ('userdebug', 'eng') or debuggable == '1'
+        
+        # Build new format PIF
+        pif = {
+            "ID": build_id,
+            "BRAND": brand,
+            "DEVICE": device,
+            "MANUFACTURER": manufacturer,
+            "FINGERPRINT": fingerprint,
+            "MODEL": model,
+            "PRODUCT": product,
+            "SECURITY_PATCH": security_patch,
+            "DEVICE_INITIAL_SDK_INT": str(api_level),
+            "TYPE": build_type,
+            "TAG": build_tags,
+            "RELEASE": release,
+            "DEBUG": is_debug,
+            "spoofBuild": "1",
+            "spoofProps": "0",
+            "spoofProvider": "0",
+            "spoofSignature": "0",
+            "spoofVendingSdk": "0",
+            "verboseLogs": "0"
+        }
+    
+    # Validate before returning
+    validate_pif(pif, output_format, api_level)
+    
+    return pif
+
+
+def serialize_pif(pif: Pif, output_format: str) -> Optional[bytes]:
+    """
+    Serialize a PIF to UTF-8 JSON bytes, same output as json.dumps(pif, indent=2)
+    
+    Returns None if the PIF doesn't have the expected keys and value types.
+    """
+    fields: tuple[str, ...]
+    if output_format == 'legacy':
+        fields, template = LEGACY_PIF_FIELDS, LEGACY_PIF_TEMPLATE
+    else:
+        fields, template = PIF_FIELDS, PIF_TEMPLATE
+    
+    if tuple(pif) != fields:
+        return None
+    for field in fields:
+        if not isinstance(pif[field], (str, bool)):
+            return None
+    
+    return (template % tuple(json_scalar(pif[field]) for field in fields)).encode('ascii')
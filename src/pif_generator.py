@@ -4,341 +4,505 @@ Core PIF Generator Module for Android system.prop files
 Supports both legacy (default) and new extended PIF formats
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import zipfile
-import io
+import contextlib
+import hashlib
+import itertools
 import json
-import sys
+import os
 import re
+import sys
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
 from pathlib import Path
 
+from . import _core
+
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+CACHE_MAX_AGE = 30 * 24 * 3600
+
+# GitHub's release asset "digest" field
+DIGEST_RE = re.compile(r'sha256:([0-9a-f]{64})')
+
+# ZIP record layouts (APPNOTE.TXT 4.3.7, 4.3.12, 4.3.16)
+LOCAL_SIGNATURE = b'PK\x03\x04'
+CDIR_SIGNATURE = b'PK\x01\x02'
+EOCD_SIGNATURE = b'PK\x05\x06'
+LOCAL_STRUCT = struct.Struct('<4s5H3L2H')
+CDIR_STRUCT = struct.Struct('<4s6H3L5H2L')
+EOCD_STRUCT = struct.Struct('<4s4H2LH')
+
+# EOCD record plus the largest possible archive comment
+ZIP_TAIL_SIZE = EOCD_STRUCT.size + 0xFFFF
+LOCAL_SLACK = 1024
+
+
+class ZipRangeError(Exception):
+    """Fast-path extraction isn't possible; fall back to the next slower path"""
+
+
+# Shared by every worker thread so lines from concurrent assets don't interleave
+_print_lock = threading.Lock()
+_log_buffer = threading.local()
+
+
+def log(*args, **kwargs):
+    """Thread-safe print, held back while this thread is inside buffered_log()"""
+    lines = getattr(_log_buffer, 'lines', None)
+    if lines is not None:
+        lines.append((args, kwargs))
+        return
+    
+    with _print_lock:
+        print(*args, **kwargs)
+
+
+@contextlib.contextmanager
+def buffered_log(lines):
+    """Collect this thread's log() calls into lines instead of printing them"""
+    _log_buffer.lines = lines
+    try:
+        yield lines
+    finally:
+        _log_buffer.lines = None
+
+
+def replay_log(lines):
+    """Print lines collected by buffered_log as one uninterrupted block"""
+    with _print_lock:
+        for args, kwargs in lines:
+            print(*args, **kwargs)
+
+
+def iter_lines(chunks):
+    """Split a stream of byte chunks into lines without buffering the whole stream"""
+    pending = b''
+    for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def dump_json(obj):
+    """Serialize to indented UTF-8 JSON bytes, byte-identical to the PIF templates"""
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+
+def write_file(path, data):
+    """Write bytes with a single unbuffered os.write where possible"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def generator_version():
+    """Short hash of the code that turns a ZIP into PIF bytes"""
+    digest = hashlib.sha256()
+    for name in ('_core.py', 'pif_generator.py'):
+        digest.update(Path(__file__).with_name(name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class AssetCache:
+    """Generated PIFs keyed on the ZIP's content digest, shared across releases and feeds"""
+    
+    def __init__(self, root='.cache/assets', max_age=CACHE_MAX_AGE):
+        """
+        Initialize asset cache
+        
+        Args:
+            root: directory holding one subdirectory per generator version
+            max_age: seconds an entry may go unused before prune() drops it
+        """
+        self.root = Path(root)
+        self.max_age = max_age
+        # Any change to the generator code starts a fresh namespace
+        self.version = generator_version()
+    
+    def _path(self, digest, output_format):
+        """Entry path for a "sha256:<hex>" digest; None for missing or other digests"""
+        m = DIGEST_RE.fullmatch(digest or '')
+        if m is None:
+            return None
+        return self.root / self.version / output_format / f"{m.group(1)}.json"
+    
+    def lookup(self, digest, output_format):
+        """Return the cached PIF bytes for a ZIP with this digest, or None"""
+        path = self._path(digest, output_format)
+        if path is None:
+            return None
+        
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        
+        # Mark as recently used for prune()
+        os.utime(path)
+        return data
+    
+    def store(self, digest, output_format, data):
+        """Record the serialized PIF generated from a ZIP with this digest"""
+        path = self._path(digest, output_format)
+        if path is None:
+            return
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        write_file(tmp_path, data)
+        os.replace(tmp_path, path)
+    
+    def prune(self):
+        """Drop entries from other generator versions and ones unused for max_age"""
+        if not self.root.is_dir():
+            return
+        
+        for entry in self.root.iterdir():
+            if entry.name != self.version:
+                if entry.is_dir():
+                    shutil.rmtree(entry, ignore_errors=True)
+                else:
+                    entry.unlink(missing_ok=True)
+        
+        cutoff = time.time() - self.max_age
+        for path in (self.root / self.version).glob('*/*.json'):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
 
 class PIFGenerator:
     """Generate PIF JSON from Android system.prop files"""
     
-    def __init__(self, repo_type='stable', output_format='new'):
+    def __init__(self, repo_type='stable', output_format='new', cache=None):
         """
         Initialize PIF Generator
         
         Args:
             repo_type: 'stable' or 'experimental'
             output_format: 'legacy' (default, 8 fields) or 'new' (20 fields)
+            cache: optional AssetCache used to skip ZIPs already seen
         """
         self.repo_type = repo_type
         self.output_format = output_format
+        self.cache = cache
         self.prefix = "EXPERIMENTAL_" if repo_type == "experimental" else "Stable_PIF_"
+        
+        # One keep-alive pool shared by every download (and worker thread)
+        # saves a TCP + TLS handshake per asset
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+        ))
+        # ZIPs are already compressed
+        self._session.headers['Accept-Encoding'] = 'identity'
+        
+        # Keys build_pif can read, and the top-priority key of each chain: once
+        # all of the latter are seen every field is decided and parsing can stop
+        self._needed_keys = _core.needed_keys(output_format)
+        self._decisive_keys = _core.decisive_keys(output_format)
     
-    def parse_system_prop(self, content):
-        """Parse Android system.prop format"""
-        props = {}
-        for line in content.splitlines():
-            line = line.strip()
-            if '=' in line and not line.startswith('#'):
-                try:
-                    key, val = line.split('=', 1)
-                    props[key.strip()] = val.strip()
-                except ValueError:
-                    continue
-        return props
+    def parse_system_prop(self, lines, only_needed=False):
+        """
+        Parse Android system.prop lines (raw bytes) into trimmed str values
+        
+        Args:
+            lines: iterable of raw lines
+            only_needed: keep just the keys build_pif reads, and stop reading
+                once every field's top-priority key has a value
+        """
+        if only_needed:
+            return _core.parse_system_prop(lines, self._needed_keys, self._decisive_keys)
+        return _core.parse_system_prop(lines)
     
     def download_and_extract(self, url):
-        """Download ZIP and extract system.prop"""
-        print(f"[INFO] Downloading: {url}")
-        resp = requests.get(url, timeout=120)
-        resp.raise_for_status()
+        """Download ZIP and stream out the decompressed system.prop chunks"""
+        log(f"[INFO] Downloading: {url}")
         
-        with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-            for name in z.namelist():
-                if name.endswith('system.prop'):
-                    print(f"[INFO] Found: {name}")
-                    return z.read(name).decode('utf-8')
+        # Only system.prop is needed, so when the server honours Range requests
+        # fetch just the central directory and that one entry
+        head = self._session.head(url, allow_redirects=True, timeout=30)
+        size = int(head.headers.get('Content-Length') or 0)
+        if head.ok and head.headers.get('Accept-Ranges') == 'bytes' and size:
+            try:
+                return self._extract_ranged(head.url, size)
+            except ZipRangeError as e:
+                log(f"[WARN] Ranged fetch failed ({e}), downloading full ZIP")
         
-        raise FileNotFoundError("system.prop not found in ZIP")
+        return self._extract_full(url)
     
-    def extract_security_patch(self, fingerprint, build_id):
-        """Extract security patch date from fingerprint or build ID"""
-        # Try to extract from build ID format: BP3A.251005.004.B3 -> 2025-10-05
-        if build_id:
-            match = re.search(r'\.(\d{2})(\d{2})(\d{2})\.', build_id)
-            if match:
-                year, month, day = match.groups()
-                return f"20{year}-{month}-{day}"
-        
-        # Try to extract from fingerprint
-        if fingerprint:
-            match = re.search(r'/([A-Z0-9]+\.\d{6}\.[^/]+)/', fingerprint)
-            if match:
-                build_id_from_fp = match.group(1)
-                date_match = re.search(r'\.(\d{2})(\d{2})(\d{2})\.', build_id_from_fp)
-                if date_match:
-                    year, month, day = date_match.groups()
-                    return f"20{year}-{month}-{day}"
+    def _fetch_range(self, url, start, end, stream=False):
+        """Fetch bytes [start, end] (inclusive) of a remote file"""
+        # Always stream, so a server that ignores Range isn't read to the end
+        # just to discard the full body
+        resp = self._session.get(url, headers={'Range': f'bytes={start}-{end}'}, timeout=120, stream=True)
+        if resp.status_code != 206:
+            resp.close()
+            resp.raise_for_status()
+            raise ZipRangeError(f"server ignored Range header (HTTP {resp.status_code})")
+        if stream:
+            return resp
+        with resp:
+            return resp.content
+    
+    def _extract_ranged(self, url, size):
+        """Locate system.prop using HTTP Range requests only"""
+        def stream(start, end):
+            resp = self._fetch_range(url, start, end, stream=True)
+            return resp.iter_content(chunk_size=CHUNK_SIZE), resp
         
-        return ""
+        return self._extract_entry(lambda start, end: self._fetch_range(url, start, end), stream, size)
     
-    def validate_pif(self, pif):
-        """Validate PIF has no empty fields"""
-        required_fields = ['MANUFACTURER', 'MODEL', 'FINGERPRINT', 'BRAND', 'PRODUCT', 'DEVICE']
+    def _extract_entry(self, fetch, stream, size):
+        """
+        Locate system.prop from the central directory and stream it out
         
-        # Add ID requirement only for new format
-        if self.output_format == 'new':
-            required_fields.append('ID')
+        fetch(start, end) returns bytes [start, end] (inclusive) of the archive
+        and stream(start, end) returns (chunk iterator, closeable or None) for
+        the same span. Everything that can fail over to a slower path raises
+        ZipRangeError here, before the returned iterator yields anything.
+        """
+        # End of central directory record sits in the last 22 bytes + comment
+        tail_start = max(0, size - ZIP_TAIL_SIZE)
+        tail = fetch(tail_start, size - 1)
         
-        for field in required_fields:
-            value = pif.get(field, '')
-            if not value or not value.strip():
-                raise ValueError(f"Field '{field}' is empty or missing")
+        pos = tail.rfind(EOCD_SIGNATURE)
+        if pos < 0 or len(tail) - pos < EOCD_STRUCT.size:
+            raise ZipRangeError("end of central directory not found")
         
-        # Validate FIRST_API_LEVEL (legacy format)
-        if 'FIRST_API_LEVEL' in pif:
-            try:
-                api_level = int(pif.get('FIRST_API_LEVEL', 0))
-                if api_level < 21:  # Minimum Android 5.0
-                    raise ValueError(f"Invalid FIRST_API_LEVEL: {api_level}")
-            except (ValueError, TypeError):
-                raise ValueError(f"FIRST_API_LEVEL must be a valid integer: {pif.get('FIRST_API_LEVEL')}")
+        _, _, _, _, count, cd_size, cd_offset, _ = EOCD_STRUCT.unpack_from(tail, pos)
+        if 0xFFFFFFFF in (cd_size, cd_offset) or count == 0xFFFF:
+            raise ZipRangeError("ZIP64 archives are not supported")
         
-        # Validate DEVICE_INITIAL_SDK_INT (new format)
-        if 'DEVICE_INITIAL_SDK_INT' in pif:
-            try:
-                initial_sdk = int(pif.get('DEVICE_INITIAL_SDK_INT', 0))
-                if initial_sdk < 21:  # Minimum Android 5.0
-                    raise ValueError(f"Invalid DEVICE_INITIAL_SDK_INT: {initial_sdk}")
-            except (ValueError, TypeError):
-                raise ValueError(f"DEVICE_INITIAL_SDK_INT must be a valid integer: {pif.get('DEVICE_INITIAL_SDK_INT')}")
+        if cd_offset >= tail_start:
+            cd = tail[cd_offset - tail_start:cd_offset - tail_start + cd_size]
+        else:
+            cd = fetch(cd_offset, cd_offset + cd_size - 1)
         
-        # Validate SECURITY_PATCH format (YYYY-MM-DD)
-        security_patch = pif.get('SECURITY_PATCH', '')
-        if security_patch and len(security_patch) != 10:
-            raise ValueError(f"Invalid SECURITY_PATCH format: {security_patch}")
+        # Walk the central directory looking for system.prop
+        pos = 0
+        for _ in range(count):
+            if cd[pos:pos + 4] != CDIR_SIGNATURE:
+                raise ZipRangeError("corrupt central directory")
+            (_, _, _, flags, method, _, _, crc, comp_size, _,
+             name_len, extra_len, comment_len, _, _, _, local_offset) = CDIR_STRUCT.unpack_from(cd, pos)
+            name = cd[pos + CDIR_STRUCT.size:pos + CDIR_STRUCT.size + name_len]
+            pos += CDIR_STRUCT.size + name_len + extra_len + comment_len
+            
+            if name.endswith(b'system.prop'):
+                break
+        else:
+            raise FileNotFoundError("system.prop not found in ZIP")
         
-        return True
-    
-    def build_pif(self, props):
-        """Build PIF JSON from properties with strict validation"""
+        log(f"[INFO] Found: {name.decode('utf-8' if flags & 0x800 else 'cp437')}")
         
-        if self.output_format == 'legacy':
-            # ===== LEGACY FORMAT (ORIGINAL IMPLEMENTATION) =====
-            # Extract fingerprint
-            fingerprint = (
-                props.get('ro.build.fingerprint') or
-                props.get('ro.product.build.fingerprint') or
-                props.get('ro.bootimage.build.fingerprint') or
-                props.get('ro.vendor.build.fingerprint') or
-                props.get('ro.system.build.fingerprint') or ''
-            ).strip()
-            
-            if not fingerprint:
-                raise ValueError("No fingerprint found in system.prop")
-            
-            # Extract product (try multiple sources)
-            product = (
-                props.get('ro.build.product') or
-                props.get('ro.product.device') or
-                props.get('ro.product.name') or
-                props.get('ro.product.board') or ''
-            ).strip()
-            
-            # Extract device
-            device = (
-                props.get('ro.product.device') or
-                props.get('ro.build.product') or
-                props.get('ro.product.board') or ''
-            ).strip()
-            
-            # Extract first API level
-            first_api_level = (
-                props.get('ro.product.first_api_level') or
-                props.get('ro.board.first_api_level') or
-                props.get('ro.board.api_level') or
-                props.get('ro.build.version.sdk') or
-                props.get('ro.system.build.version.sdk') or
-                '0'
-            ).strip()
-            
-            # Build PIF
-            pif = {
-                "MANUFACTURER": props.get('ro.product.manufacturer', 'Google').strip(),
-                "MODEL": props.get('ro.product.model', 'Unknown').strip(),
-                "FINGERPRINT": fingerprint,
-                "BRAND": props.get('ro.product.brand', 'google').strip(),
-                "PRODUCT": product,
-                "DEVICE": device,
-                "SECURITY_PATCH": (props.get('ro.build.version.security_patch') or 
-                                  props.get('ro.vendor.build.security_patch') or '').strip(),
-                "FIRST_API_LEVEL": str(int(first_api_level))
-            }
+        if flags & 0x1:
+            raise ZipRangeError("encrypted entry")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ZipRangeError(f"unsupported compression method {method}")
         
+        # The local header's extra field may differ from the central one, so
+        # over-fetch a little past the expected end of the data
+        end = min(size, local_offset + LOCAL_STRUCT.size + name_len + extra_len + comp_size + LOCAL_SLACK)
+        closer = None
+        if local_offset >= tail_start:
+            # Small archives: the entry is already in the tail we fetched
+            chunks = iter([tail[local_offset - tail_start:end - tail_start]])
         else:
-            # ===== NEW EXTENDED FORMAT =====
-            # Extract fingerprint (prioritize system_ext)
-            fingerprint = (
-                props.get('ro.system_ext.build.fingerprint') or
-                props.get('ro.system.build.fingerprint') or
-                props.get('ro.build.fingerprint') or
-                props.get('ro.product.build.fingerprint') or
-                props.get('ro.bootimage.build.fingerprint') or
-                props.get('ro.vendor.build.fingerprint') or
-                props.get('ro.system_dlkm.build.fingerprint') or ''
-            ).strip()
-            
-            if not fingerprint:
-                raise ValueError("No fingerprint found in system.prop")
-            
-            # Extract build ID (prioritize system_ext)
-            build_id = (
-                props.get('ro.system_ext.build.id') or
-                props.get('ro.system.build.id') or
-                props.get('ro.build.id') or
-                props.get('ro.vendor.build.id') or
-                props.get('ro.system_dlkm.build.id') or ''
-            ).strip()
-            
-            if not build_id:
-                raise ValueError("No build ID found in system.prop")
-            
-            # Extract product (prioritize system_ext)
-            product = (
-                props.get('ro.product.system_ext.name') or
-                props.get('ro.product.system.name') or
-                props.get('ro.product.name') or
-                props.get('ro.build.product') or
-                props.get('ro.product.system_ext.device') or
-                props.get('ro.product.device') or
-                props.get('ro.product.board') or ''
-            ).strip()
-            
-            # Extract device (prioritize system_ext)
-            device = (
-                props.get('ro.product.system_ext.device') or
-                props.get('ro.product.system.device') or
-                props.get('ro.product.device') or
-                props.get('ro.build.product') or
-                props.get('ro.product.board') or ''
-            ).strip()
-            
-            # Extract brand (prioritize system_ext)
-            brand = (
-                props.get('ro.product.system_ext.brand') or
-                props.get('ro.product.system.brand') or
-                props.get('ro.product.brand') or
-                'google'
-            ).strip()
-            
-            # Extract manufacturer (prioritize system_ext)
-            manufacturer = (
-                props.get('ro.product.system_ext.manufacturer') or
-                props.get('ro.product.system.manufacturer') or
-                props.get('ro.product.manufacturer') or
-                'Google'
-            ).strip()
+            chunks, closer = stream(local_offset, end - 1)
+        
+        # Read just far enough to parse the local header
+        try:
+            data = b''
             
-            # Extract model (prioritize system_ext)
-            model = (
-                props.get('ro.product.system_ext.model') or
-                props.get('ro.product.system.model') or
-                props.get('ro.product.model') or
-                'Unknown'
-            ).strip()
+            def read_until(n):
+                nonlocal data
+                while len(data) < n:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        raise ZipRangeError("truncated local file header")
+                    data += chunk
             
-            # Extract device initial SDK (when device hardware first launched)
-            device_initial_sdk = (
-                props.get('ro.product.first_api_level') or
-                props.get('ro.board.first_api_level') or
-                props.get('ro.board.api_level') or
-                props.get('ro.system_ext.build.version.sdk') or
-                props.get('ro.system.build.version.sdk') or
-                props.get('ro.build.version.sdk') or
-                '0'
-            ).strip()
+            read_until(LOCAL_STRUCT.size)
+            if data[:4] != LOCAL_SIGNATURE:
+                raise ZipRangeError("corrupt local file header")
+            _, _, _, _, _, _, _, _, _, local_name_len, local_extra_len = LOCAL_STRUCT.unpack_from(data)
+            data_start = LOCAL_STRUCT.size + local_name_len + local_extra_len
+            if data_start + comp_size > end - local_offset:
+                raise ZipRangeError("local header larger than expected")
+            read_until(data_start)
+        except Exception:
+            if closer is not None:
+                closer.close()
+            raise
+        
+        return self._read_entry(itertools.chain([data[data_start:]], chunks), method, comp_size, crc, closer)
+    
+    def _read_entry(self, chunks, method, comp_size, crc, closer=None):
+        """Inflate (DEFLATE) or pass through (STORED) comp_size bytes as they stream in"""
+        # Raw zlib instead of ZipExtFile; the CRC is still checked if the
+        # entry is read to the end
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if method == zipfile.ZIP_DEFLATED else None
+        remaining = comp_size
+        checksum = 0
+        
+        try:
+            for chunk in chunks:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+                out = decompressor.decompress(chunk) if decompressor else chunk
+                checksum = zlib.crc32(out, checksum)
+                yield out
+                if not remaining:
+                    break
             
-            # Extract build type (prioritize system_ext)
-            build_type = (
-                props.get('ro.system_ext.build.type') or
-                props.get('ro.system.build.type') or
-                props.get('ro.build.type') or
-                'user'
-            ).strip()
+            if decompressor:
+                out = decompressor.flush()
+                checksum = zlib.crc32(out, checksum)
+                yield out
             
-            # Extract build tags (prioritize system_ext)
-            build_tags = (
-                props.get('ro.system_ext.build.tags') or
-                props.get('ro.system.build.tags') or
-                props.get('ro.build.tags') or
-                'release-keys'
-            ).strip()
+            if remaining or checksum != crc:
+                raise zipfile.BadZipFile("Bad CRC-32 for file system.prop")
+        finally:
+            if closer is not None:
+                closer.close()
+    
+    def _extract_full(self, url):
+        """Download the whole ZIP and stream out the decompressed system.prop chunks"""
+        # Stream the body to a spooled file instead of buffering resp.content:
+        # small ZIPs stay in memory, large ones roll over to disk
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buf:
+            with self._session.get(url, timeout=120, stream=True) as resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    buf.write(chunk)
+            size = buf.tell()
             
-            # Extract Android release version (prioritize system_ext)
-            release = (
-                props.get('ro.system_ext.build.version.release') or
-                props.get('ro.system.build.version.release') or
-                props.get('ro.build.version.release') or
-                props.get('ro.build.version.release_or_codename') or
-                ''
-            ).strip()
+            def fetch(start, end):
+                buf.seek(start)
+                return buf.read(end - start + 1)
             
-            # Extract security patch from properties or fingerprint/build ID
-            security_patch = (
-                props.get('ro.build.version.security_patch') or
-                props.get('ro.vendor.build.security_patch') or
-                ''
-            ).strip()
+            def stream(start, end):
+                def chunks():
+                    buf.seek(start)
+                    remaining = end - start + 1
+                    while remaining > 0:
+                        chunk = buf.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        yield chunk
+                return chunks(), None
             
-            if not security_patch:
-                security_patch = self.extract_security_patch(fingerprint, build_id)
+            try:
+                chunks = self._extract_entry(fetch, stream, size)
+            except ZipRangeError as e:
+                # Anything exotic (ZIP64, other compression methods) goes to zipfile
+                log(f"[WARN] {e}, extracting with zipfile")
+                chunks = self._extract_zipfile(buf)
             
-            # Determine DEBUG flag
-            debuggable = props.get('ro.debuggable', '0').strip()
-            is_debug = build_type in ['userdebug', 'eng'] or debuggable == '1'
+            yield from chunks
+    
+    def _extract_zipfile(self, buf):
+        """Stream out system.prop from a local ZIP file object with zipfile"""
+        buf.seek(0)
+        with zipfile.ZipFile(buf) as z:
+            info = next((i for i in z.infolist() if i.filename.endswith('system.prop')), None)
+            if info is None:
+                raise FileNotFoundError("system.prop not found in ZIP")
             
-            # Build new format PIF
-            pif = {
-                "ID": build_id,
-                "BRAND": brand,
-                "DEVICE": device,
-                "MANUFACTURER": manufacturer,
-                "FINGERPRINT": fingerprint,
-                "MODEL": model,
-                "PRODUCT": product,
-                "SECURITY_PATCH": security_patch,
-                "DEVICE_INITIAL_SDK_INT": str(int(device_initial_sdk)),
-                "TYPE": build_type,
-                "TAG": build_tags,
-                "RELEASE": release,
-                "DEBUG": is_debug,
-                "spoofBuild": "1",
-                "spoofProps": "0",
-                "spoofProvider": "0",
-                "spoofSignature": "0",
-                "spoofVendingSdk": "0",
-                "verboseLogs": "0"
-            }
+            log(f"[INFO] Found: {info.filename}")
+            with z.open(info) as f:
+                yield from iter(lambda: f.read(CHUNK_SIZE), b'')
+    
+    def extract_security_patch(self, fingerprint, build_id):
+        """Extract security patch date from fingerprint or build ID"""
+        return _core.extract_security_patch(fingerprint, build_id)
+    
+    def validate_pif(self, pif, api_level=None):
+        """
+        Validate PIF has no empty fields
         
-        # Validate before returning
-        self.validate_pif(pif)
+        Args:
+            pif: PIF dict to validate
+            api_level: API level build_pif already parsed, to skip re-parsing it
+        """
+        return _core.validate_pif(pif, self.output_format, api_level)
+    
+    def build_pif(self, props):
+        """Build PIF JSON from properties with strict validation
         
-        return pif
+        props values must already be trimmed, as parse_system_prop returns them
+        """
+        return _core.build_pif(props, self.output_format)
+    
+    def _build_from_chunks(self, chunks):
+        """Parse system.prop straight off the stream and build its PIF"""
+        # Stopping early closes the download as well
+        with contextlib.closing(chunks):
+            props = self.parse_system_prop(iter_lines(chunks), only_needed=True)
+        
+        log(f"[DEBUG] Parsed {len(props)} relevant properties")
+        
+        return self.build_pif(props)
     
-    def generate(self, zip_name, url):
-        """Generate PIF JSON from ZIP URL"""
+    def serialize_pif(self, pif):
+        """Serialize a PIF to UTF-8 JSON bytes, same output as json.dumps(pif, indent=2)"""
+        data = _core.serialize_pif(pif, self.output_format)
+        
+        # Unexpected shape or value types: use the general encoder
+        return data if data is not None else dump_json(pif)
+    
+    def generate(self, zip_name, url, digest=None):
+        """
+        Generate PIF JSON from ZIP URL
+        
+        Args:
+            zip_name: asset name the output filename is derived from
+            url: asset download URL
+            digest: the asset's "sha256:..." content digest, if GitHub reported one
+        """
         try:
-            # Download and parse
-            content = self.download_and_extract(url)
-            props = self.parse_system_prop(content)
+            filename = f"{self.prefix}{zip_name.replace('.zip', '')}.json"
             
-            print(f"[DEBUG] Parsed {len(props)} properties")
+            # Same ZIP re-uploaded to a new release (or the other feed): reuse its PIF
+            if self.cache:
+                cached = self.cache.lookup(digest, self.output_format)
+                if cached is not None:
+                    write_file(filename, cached)
+                    log(f"[CACHED] {filename}")
+                    return filename
             
-            pif = self.build_pif(props)
+            # Download, inflate and parse in a single streaming pass
+            pif = self._build_from_chunks(self.download_and_extract(url))
             
             # Save to file
-            filename = f"{self.prefix}{zip_name.replace('.zip', '')}.json"
-            output_path = Path(filename)
-            output_path.write_text(json.dumps(pif, indent=2))
+            data = self.serialize_pif(pif)
+            write_file(filename, data)
+            
+            if self.cache:
+                self.cache.store(digest, self.output_format, data)
             
-            print(f"[SUCCESS] {filename}")
-            print(f"[VALIDATION] All fields populated correctly")
+            log(f"[SUCCESS] {filename}")
+            log(f"[VALIDATION] All fields populated correctly")
             
             return filename
             
         except Exception as e:
-            print(f"[ERROR] {zip_name}: {e}", file=sys.stderr)
+            log(f"[ERROR] {zip_name}: {e}", file=sys.stderr)
             raise
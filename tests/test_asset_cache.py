@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Check the digest-keyed PIF cache and how generate() uses it
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pif_generator import AssetCache, PIFGenerator
+
+
+DIGEST = "sha256:" + "ab" * 32
+PIF = b'{\n  "MODEL": "Pixel 9"\n}'
+
+
+def test_store_and_lookup(tmp_path):
+    cache = AssetCache(tmp_path)
+    assert cache.lookup(DIGEST, 'new') is None
+    
+    cache.store(DIGEST, 'new', PIF)
+    
+    assert cache.lookup(DIGEST, 'new') == PIF
+    assert cache.lookup(DIGEST, 'legacy') is None
+    # A fresh instance (next run) sees the same entry
+    assert AssetCache(tmp_path).lookup(DIGEST, 'new') == PIF
+
+
+@pytest.mark.parametrize('digest', [None, '', 'md5:abc', 'sha256:../../etc/passwd'])
+def test_unusable_digest_is_never_cached(tmp_path, digest):
+    cache = AssetCache(tmp_path)
+    cache.store(digest, 'new', PIF)
+    
+    assert cache.lookup(digest, 'new') is None
+    assert not any(tmp_path.rglob('*.json'))
+
+
+def test_prune_drops_other_versions_and_stale_entries(tmp_path):
+    cache = AssetCache(tmp_path)
+    cache.store(DIGEST, 'new', PIF)
+    stale = "sha256:" + "cd" * 32
+    cache.store(stale, 'new', PIF)
+    
+    old = time.time() - cache.max_age - 60
+    stale_path = tmp_path / cache.version / 'new' / f"{'cd' * 32}.json"
+    os.utime(stale_path, (old, old))
+    
+    (tmp_path / 'oldversion' / 'new').mkdir(parents=True)
+    (tmp_path / 'oldversion' / 'new' / f"{'ab' * 32}.json").write_bytes(b'{}')
+    
+    cache.prune()
+    
+    assert cache.lookup(DIGEST, 'new') == PIF
+    assert cache.lookup(stale, 'new') is None
+    assert not (tmp_path / 'oldversion').exists()
+
+
+def test_lookup_refreshes_last_used(tmp_path):
+    cache = AssetCache(tmp_path)
+    cache.store(DIGEST, 'new', PIF)
+    path = tmp_path / cache.version / 'new' / f"{'ab' * 32}.json"
+    old = time.time() - cache.max_age - 60
+    os.utime(path, (old, old))
+    
+    cache.lookup(DIGEST, 'new')
+    cache.prune()
+    
+    assert path.exists()
+
+
+def test_generate_hit_skips_download(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = AssetCache(tmp_path / 'cache')
+    cache.store(DIGEST, 'new', PIF)
+    generator = PIFGenerator('experimental', cache=cache)
+    
+    def no_download(url):
+        raise AssertionError("cached asset was downloaded")
+    
+    monkeypatch.setattr(generator, 'download_and_extract', no_download)
+    
+    filename = generator.generate('tokay-beta.zip', 'https://zip.test/tokay-beta.zip', DIGEST)
+    
+    assert filename == 'EXPERIMENTAL_tokay-beta.json'
+    assert Path(filename).read_bytes() == PIF
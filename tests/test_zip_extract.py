@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Check system.prop extraction on both download paths against zipfile
+"""
+import io
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pif_generator import PIFGenerator, ZIP_TAIL_SIZE
+
+
+URL = "https://zip.test/asset.zip"
+
+
+class _CountingBody(io.BytesIO):
+    """Response body that tallies how many bytes the client actually read"""
+    
+    def __init__(self, data, server):
+        super().__init__(data)
+        self.server = server
+    
+    def read(self, *args):
+        chunk = super().read(*args)
+        self.server.sent += len(chunk)
+        return chunk
+
+
+class ZipServer(BaseAdapter):
+    """In-process transport serving one archive, optionally honouring Range"""
+    
+    def __init__(self, data, advertise_ranges=True, honour_ranges=True):
+        super().__init__()
+        self.data = data
+        self.advertise_ranges = advertise_ranges
+        self.honour_ranges = honour_ranges
+        self.sent = 0
+    
+    def send(self, request, **kwargs):
+        body = self.data
+        status = 200
+        headers = {'Content-Length': str(len(body))}
+        if self.advertise_ranges:
+            headers['Accept-Ranges'] = 'bytes'
+        
+        spec = request.headers.get('Range')
+        if spec and self.honour_ranges:
+            start, end = map(int, spec[len('bytes='):].split('-'))
+            body = self.data[start:end + 1]
+            status = 206
+            headers['Content-Length'] = str(len(body))
+            headers['Content-Range'] = f"bytes {start}-{start + len(body) - 1}/{len(self.data)}"
+        
+        resp = requests.Response()
+        resp.status_code = status
+        resp.headers = CaseInsensitiveDict(headers)
+        resp.raw = _CountingBody(b'' if request.method == 'HEAD' else body, self)
+        resp.url = request.url
+        resp.request = request
+        return resp
+    
+    def close(self):
+        pass
+
+
+class _Unseekable:
+    """Write-only sink, which makes zipfile emit data descriptors"""
+    
+    def __init__(self):
+        self.buf = io.BytesIO()
+    
+    def write(self, data):
+        return self.buf.write(data)
+    
+    def flush(self):
+        pass
+
+
+def make_prop(size):
+    """system.prop content of roughly size bytes"""
+    lines = [b"ro.product.model=Pixel 9", b"ro.build.fingerprint=google/tokay/tokay:15/AP4A/1:user/release-keys"]
+    total = sum(len(line) + 1 for line in lines)
+    i = 0
+    while total < size:
+        lines.append(f"ro.filler.key{i}=value {i}".encode())
+        total += len(lines[-1]) + 1
+        i += 1
+    return b"\n".join(lines) + b"\n"
+
+
+def make_zip(prop, compression=zipfile.ZIP_DEFLATED, padding=0, data_descriptor=False):
+    """Build an archive with system.prop first, then padding bytes of incompressible data"""
+    sink = _Unseekable() if data_descriptor else io.BytesIO()
+    with zipfile.ZipFile(sink, 'w') as z:
+        z.writestr('META-INF/MANIFEST.MF', b'Manifest-Version: 1.0\n')
+        z.writestr('system/build/system.prop', prop, compress_type=compression)
+        if padding:
+            z.writestr('padding.bin', os.urandom(padding), compress_type=zipfile.ZIP_STORED)
+    return sink.buf.getvalue() if data_descriptor else sink.getvalue()
+
+
+def expected(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return z.read('system/build/system.prop')
+
+
+def extract(data, ranged, honour_ranges=True):
+    """Run download_and_extract against an in-process server; returns (bytes, server)"""
+    generator = PIFGenerator()
+    server = ZipServer(data, advertise_ranges=ranged, honour_ranges=honour_ranges)
+    generator._session.mount('https://zip.test/', server)
+    return b''.join(generator.download_and_extract(URL)), server
+
+
+@pytest.mark.parametrize('ranged', [True, False], ids=['ranged', 'full'])
+@pytest.mark.parametrize('data_descriptor', [False, True], ids=['sized', 'descriptor'])
+@pytest.mark.parametrize('layout', ['tail', 'streamed'])
+@pytest.mark.parametrize('compression', [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED], ids=['stored', 'deflate'])
+def test_matches_zipfile(compression, layout, data_descriptor, ranged):
+    if layout == 'tail':
+        data = make_zip(make_prop(4 * 1024), compression, data_descriptor=data_descriptor)
+        assert len(data) < ZIP_TAIL_SIZE
+    else:
+        # Several chunks of system.prop well before the tail
+        data = make_zip(make_prop(300 * 1024), compression, padding=2 * ZIP_TAIL_SIZE,
+                        data_descriptor=data_descriptor)
+    
+    content, server = extract(data, ranged)
+    
+    assert content == expected(data)
+    if ranged and layout == 'streamed':
+        assert server.sent < len(data)
+
+
+@pytest.mark.parametrize('ranged', [True, False], ids=['ranged', 'full'])
+@pytest.mark.parametrize('layout', ['tail', 'streamed'])
+def test_corrupt_crc(layout, ranged):
+    prop = make_prop(4 * 1024)
+    data = make_zip(prop, zipfile.ZIP_STORED, padding=2 * ZIP_TAIL_SIZE if layout == 'streamed' else 0)
+    
+    # Flip one byte of the stored content, leaving the recorded CRC alone
+    pos = data.index(b"Pixel 9")
+    data = data[:pos] + b"Q" + data[pos + 1:]
+    
+    with pytest.raises(zipfile.BadZipFile):
+        expected(data)
+    with pytest.raises(zipfile.BadZipFile):
+        extract(data, ranged)
+
+
+def make_zip64(prop):
+    """Archive whose end of central directory defers to the ZIP64 records"""
+    limit = zipfile.ZIP_FILECOUNT_LIMIT
+    zipfile.ZIP_FILECOUNT_LIMIT = 0
+    try:
+        data = bytearray(make_zip(prop))
+    finally:
+        zipfile.ZIP_FILECOUNT_LIMIT = limit
+    
+    # Mark both entry counts in the classic record as "see ZIP64"
+    pos = data.rindex(b'PK\x05\x06')
+    data[pos + 8:pos + 12] = b'\xff\xff\xff\xff'
+    return bytes(data)
+
+
+@pytest.mark.parametrize('ranged', [True, False], ids=['ranged', 'full'])
+@pytest.mark.parametrize('kind', ['bzip2', 'zip64'])
+def test_falls_back_to_zipfile(kind, ranged):
+    prop = make_prop(4 * 1024)
+    data = make_zip(prop, zipfile.ZIP_BZIP2) if kind == 'bzip2' else make_zip64(prop)
+    
+    content, _ = extract(data, ranged)
+    
+    assert content == expected(data) == prop
+
+
+def test_range_ignored_downloads_once():
+    data = make_zip(make_prop(4 * 1024), padding=2 * ZIP_TAIL_SIZE)
+    
+    content, server = extract(data, ranged=True, honour_ranges=False)
+    
+    # The 200 answer to the Range request is closed unread; only the full fetch reads the body
+    assert content == expected(data)
+    assert server.sent == len(data)
+
+
+@pytest.mark.parametrize('ranged', [True, False], ids=['ranged', 'full'])
+def test_missing_system_prop(ranged):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr('META-INF/MANIFEST.MF', b'Manifest-Version: 1.0\n')
+    
+    with pytest.raises(FileNotFoundError):
+        extract(buf.getvalue(), ranged)